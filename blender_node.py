@@ -5,11 +5,65 @@ import numpy as np
 from PIL import Image
 import tempfile
 import platform
+import functools
+import json
+import threading
+import queue
+import collections
+import atexit
+import hashlib
+import errno
+import shutil
+import io
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
 
+# Optional faster TIFF writer for fallback texture files; Pillow is used otherwise
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+# Progress logging is off unless COMFY_BLENDER_DEBUG=1; warnings and errors
+# are always printed. The Blender worker inherits the variable.
+DEBUG = os.environ.get("COMFY_BLENDER_DEBUG", "").strip().lower() in ("1", "true", "yes", "on")
+
+def debug(*args):
+    if DEBUG:
+        print(*args)
+
+# Node folder and bundled files - resolved once at import
+NODE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_PATH = os.path.join(NODE_DIR, "blender_render_script.py")
+BLEND_FILE = os.path.join(NODE_DIR, "untitled.blend")
+
+# Renders are written and read straight back, so keep them on tmpfs when there is one
+SHM_OUTPUT_DIR = None
+if platform.system() == "Linux" and os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+    SHM_OUTPUT_DIR = "/dev/shm"
+
+# Room left for the TIFF header on top of the raw pixels
+OUTPUT_SIZE_MARGIN = 1024 * 1024
+
+def get_output_dir(output_size):
+    """Pick tmpfs for a render of output_size bytes if it still fits next to the shared textures."""
+    if SHM_OUTPUT_DIR and output_size is not None:
+        if shutil.disk_usage(SHM_OUTPUT_DIR).free >= output_size + OUTPUT_SIZE_MARGIN:
+            return SHM_OUTPUT_DIR
+        debug(f"Not enough space in {SHM_OUTPUT_DIR} for the render, using the temp directory")
+    return tempfile.gettempdir()
+
+# Fallback texture files have fixed names, so one directory is reused (and
+# overwritten) for the whole session instead of created and removed per render
+TEXTURE_DIR = tempfile.mkdtemp(prefix="comfyui_blender_textures_")
+atexit.register(shutil.rmtree, TEXTURE_DIR, ignore_errors=True)
+
+@functools.lru_cache(maxsize=1)
 def get_default_blender_path():
     """Get Blender executable path using relative paths (following Linux guide approach)"""
     # Path to Blender executable relative to the node folder (as per Linux guide)
-    node_dir = os.path.dirname(os.path.abspath(__file__))
+    node_dir = NODE_DIR
     
     # Try using the simple downloader first
     try:
@@ -36,7 +90,7 @@ def get_default_blender_path():
             if not os.access(blender_path, os.X_OK):
                 try:
                     os.chmod(blender_path, 0o755)
-                    print(f"Fixed executable permissions: {blender_path}")
+                    debug(f"Fixed executable permissions: {blender_path}")
                 except:
                     pass
         return blender_path
@@ -46,6 +100,288 @@ def get_default_blender_path():
         else:  # Linux
             raise FileNotFoundError(f"Blender not found at: {blender_path}. Please check auto-download or manually extract to 'blender' folder.")
 
+@functools.lru_cache(maxsize=1)
+def get_blend_file():
+    """Get the bundled scene file, validated once per session"""
+    if not os.path.exists(BLEND_FILE):
+        raise FileNotFoundError(f"Blender scene file not found at: {BLEND_FILE}")
+    return BLEND_FILE
+
+# Bytes of shared memory created but not filled yet. Textures are shared from
+# several threads, and /dev/shm free space only drops once pages are written.
+_shm_pending_bytes = 0
+_shm_pending_lock = threading.Lock()
+
+def share_texture(tex_array):
+    """Copy an HxWxC uint8 texture into a new RGBA shared memory block.
+
+    Returns the block (the caller closes and unlinks it) and the descriptor
+    the Blender script uses to attach to it.
+    """
+    global _shm_pending_bytes
+    height, width = tex_array.shape[:2]
+    size = height * width * 4
+    # POSIX shared memory is sparse - a full /dev/shm only shows up as SIGBUS
+    # when writing, so check the free space up front, counting blocks other
+    # threads are still filling
+    with _shm_pending_lock:
+        if os.path.isdir("/dev/shm") and shutil.disk_usage("/dev/shm").free - _shm_pending_bytes < size:
+            raise OSError(errno.ENOSPC, "Not enough space in /dev/shm")
+        _shm_pending_bytes += size
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            pixels = np.ndarray((height, width, 4), dtype=np.uint8, buffer=shm.buf)
+            if tex_array.ndim == 2:
+                tex_array = tex_array[..., None]
+            if tex_array.shape[2] == 4:
+                pixels[:] = tex_array
+            else:
+                pixels[..., :3] = tex_array[..., :3]
+                pixels[..., 3] = 255
+            del pixels
+        except Exception:
+            release_shared_textures([shm])
+            raise
+    finally:
+        # Written pages now show up in the free space itself
+        with _shm_pending_lock:
+            _shm_pending_bytes -= size
+    return shm, {"shm": shm.name, "width": width, "height": height}
+
+def release_shared_textures(shared_blocks):
+    """Close and unlink shared memory blocks created by share_texture()."""
+    for shm in shared_blocks:
+        try:
+            shm.close()
+            shm.unlink()
+        except Exception as e:
+            print(f"Warning: Could not release shared memory {shm.name}: {e}")
+
+def write_texture_file(tex_array, tex_path):
+    """Save a uint8 texture as uncompressed TIFF with a single large write.
+
+    tifffile, when installed, writes the header and the whole pixel buffer
+    directly. With Pillow the image is encoded in memory first, so the file
+    system sees one write per texture instead of one per TIFF strip.
+    """
+    if tifffile is not None:
+        tifffile.imwrite(tex_path, tex_array, photometric="rgb" if tex_array.ndim == 3 else "minisblack",
+                         compression=None)
+        return
+    buffer = io.BytesIO()
+    Image.fromarray(tex_array).save(buffer, format="TIFF", compression="raw")
+    with open(tex_path, "wb") as f:
+        f.write(buffer.getbuffer())
+
+def tensor_to_uint8(tex_tensor):
+    """Quantize a [0,1] image tensor to uint8 on its own device, then copy it to a numpy array.
+
+    Only 1 byte/pixel crosses back to the CPU, whatever dtype (FP16/FP32)
+    the upstream node produced.
+    """
+    if tex_tensor.dtype == torch.uint8:
+        return tex_tensor.contiguous().cpu().numpy()
+    try:
+        # scale=1/255 rounds and clamps to [0,255] in a single fused kernel
+        quantized = torch.quantize_per_tensor(tex_tensor.float(), scale=1.0 / 255.0, zero_point=0, dtype=torch.quint8)
+        tex_u8 = quantized.int_repr()
+    except (RuntimeError, NotImplementedError):
+        # Devices without quantized kernels
+        tex_u8 = tex_tensor.mul(255).add_(0.5).clamp_(0, 255).to(torch.uint8)
+    return tex_u8.contiguous().cpu().numpy()
+
+def pack_orm_texture(roughness_texture, specular_texture):
+    """Pack roughness (G) and specular (B) into one ORM-layout texture on the input device.
+
+    Occlusion (R) is left at 1; the scene's shader does not use it. Returns
+    None when the two maps differ in size and cannot be packed.
+    """
+    if roughness_texture.shape[:-1] != specular_texture.shape[:-1]:
+        return None
+    roughness = roughness_texture[..., 0]
+    specular = specular_texture[..., 0].to(device=roughness.device, dtype=roughness.dtype)
+    return torch.stack([torch.ones_like(roughness), roughness, specular], dim=-1)
+
+def texture_digest(tex_array):
+    """Full content hash of a converted texture, used to skip unchanged uploads."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(tex_array.shape).encode())
+    h.update(tex_array.data)
+    return h.hexdigest()
+
+def prepare_texture(tex_name, tex_tensor, cached_hash=None):
+    """Convert a texture tensor and hand it over via shared memory or a file.
+
+    Returns the texture source for the render job and the shared memory
+    block, if one was used. When the texture matches cached_hash (what the
+    worker already has) only the hash is sent.
+    """
+    if tex_tensor.dim() == 4:  # Remove batch dimension if present
+        tex_tensor = tex_tensor.squeeze(0)
+    
+    # Convert from [0,1] float to [0,255] uint8
+    tex_array = tensor_to_uint8(tex_tensor)
+    tex_hash = texture_digest(tex_array)
+    if tex_hash == cached_hash:
+        debug(f"{tex_name} texture unchanged, reusing the worker's copy")
+        return {"hash": tex_hash}, None
+    
+    try:
+        shm, source = share_texture(tex_array)
+        debug(f"Shared {tex_name} texture via shared memory: {shm.name}")
+        source["hash"] = tex_hash
+        return source, shm
+    except OSError as e:
+        # e.g. a small /dev/shm inside containers
+        print(f"Warning: Could not share {tex_name} texture in memory ({e}), writing to file")
+    
+    # Save as uncompressed TIFF - Blender reloads it immediately, so skip
+    # the PNG filter/CRC passes that run even at compress_level=0
+    tex_path = os.path.join(TEXTURE_DIR, f"input_{tex_name}.tiff")
+    write_texture_file(tex_array, tex_path)
+    debug(f"Saved {tex_name} texture to: {tex_path}")
+    return {"path": tex_path, "hash": tex_hash}, None
+
+# Inputs above this many elements are fingerprinted from an evenly strided sample
+HASH_SAMPLE_ELEMENTS = 1024
+
+def update_input_hash(h, value):
+    """Feed one node input into a hash: tensors by shape, dtype and a sample of their values."""
+    if not hasattr(value, "detach"):
+        h.update(repr(value).encode())
+        return
+    h.update(f"{tuple(value.shape)}:{value.dtype}".encode())
+    flat = value.detach().reshape(-1)
+    if flat.numel() > HASH_SAMPLE_ELEMENTS:
+        flat = flat[::flat.numel() // HASH_SAMPLE_ELEMENTS][:HASH_SAMPLE_ELEMENTS]
+    h.update(flat.contiguous().cpu().numpy().tobytes())
+
+# Protocol markers shared with run_daemon() in blender_render_script.py
+READY_MARKER = "COMFY_BLENDER_READY"
+DONE_MARKER = "COMFY_BLENDER_DONE"
+ERROR_MARKER = "COMFY_BLENDER_ERROR"
+
+# Lines of Blender output kept per stream for the log and for error reports
+OUTPUT_TAIL_LINES = 50
+
+class BlenderWorker:
+    """Long-lived Blender process that renders jobs sent as JSON lines over stdin.
+
+    The .blend file is parsed and Cycles devices/kernels are initialized once,
+    instead of on every render.
+    """
+
+    def __init__(self, blender_path, blend_file):
+        self.blender_path = blender_path
+        self.blend_file = blend_file
+        cmd = [
+            blender_path,
+            "-b",  # Background mode (no GUI)
+            blend_file,  # .blend file to open
+            "-P", SCRIPT_PATH,  # Python script to execute
+            "--",  # Separator for script arguments
+            "--daemon"
+        ]
+        if not DEBUG:
+            cmd.insert(1, "--quiet")  # No status output; warnings and errors still come through
+        debug("Starting Blender worker:", " ".join([f'"{arg}"' if ' ' in arg else arg for arg in cmd]))
+        try:
+            self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE, text=True, bufsize=1,
+                                            encoding="utf-8", errors="replace",
+                                            cwd=NODE_DIR)  # Set working directory to node folder
+        except PermissionError as e:
+            if platform.system() == "Windows":
+                error_msg = f"Permission denied when trying to execute Blender. Try running: Unblock-File '{blender_path}' in PowerShell as administrator."
+            else:  # Linux
+                error_msg = f"Permission denied when trying to execute Blender. Try running: chmod +x '{blender_path}'"
+            print(error_msg)
+            raise PermissionError(error_msg) from e
+        
+        # Drain both pipes continuously so a chatty Blender never blocks on a
+        # full pipe, keeping only the last lines of each
+        self.stdout_tail = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+        self.stderr_tail = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+        self._replies = queue.Queue()
+        self._readers = [
+            threading.Thread(target=self._pump, args=(self.process.stdout, self.stdout_tail, True), daemon=True),
+            threading.Thread(target=self._pump, args=(self.process.stderr, self.stderr_tail, False), daemon=True)
+        ]
+        for reader in self._readers:
+            reader.start()
+        
+        # Blender reports the render resolution, used to size the output file
+        resolution = json.loads(self._wait_for(READY_MARKER) or "{}")
+        self.output_size = resolution["width"] * resolution["height"] * 3 if resolution else None
+        debug("Blender worker ready!")
+        
+        # Content hash of each texture the worker reported as loaded
+        self.texture_hashes = {}
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def _pump(self, stream, tail, protocol):
+        """Reader thread: keep the output tail and forward protocol replies."""
+        for line in stream:
+            line = line.rstrip("\n")
+            if protocol and line.startswith((READY_MARKER, DONE_MARKER, ERROR_MARKER)):
+                self._replies.put(line)
+            else:
+                tail.append(line)
+        if protocol:
+            self._replies.put(None)  # stdout closed - Blender exited
+
+    def _print_output(self):
+        if self.stdout_tail:
+            print("Blender output:", "\n".join(self.stdout_tail))
+        if self.stderr_tail:
+            print("Blender warnings:", "\n".join(self.stderr_tail))
+
+    def _wait_for(self, marker):
+        """Block until Blender replies with the given protocol marker; return the text after it."""
+        reply = self._replies.get()
+        if reply is not None and reply.startswith(marker):
+            return reply[len(marker):].strip()
+        self._print_output()
+        if reply is None:
+            returncode = self.process.wait()
+            for reader in self._readers:
+                reader.join(timeout=1)
+            raise RuntimeError(f"Blender worker exited unexpectedly with code {returncode}")
+        raise RuntimeError(f"Blender render failed: {reply[len(ERROR_MARKER):].strip()}")
+
+    def render(self, job):
+        """Send a render job and block until Blender has written the output."""
+        self.stdout_tail.clear()
+        self.stderr_tail.clear()
+        self.process.stdin.write(json.dumps(job) + "\n")
+        self.process.stdin.flush()
+        try:
+            held_hashes = self._wait_for(DONE_MARKER)
+        except Exception:
+            # Blender's texture state is unknown after a failure - resend everything next time
+            self.texture_hashes = {}
+            raise
+        # Blender reports which textures it actually loaded; a texture that
+        # failed to load is not in there and gets sent in full again
+        self.texture_hashes = json.loads(held_hashes) if held_hashes else {}
+        if DEBUG:
+            self._print_output()
+
+    def close(self):
+        if not self.is_alive():
+            return
+        try:
+            self.process.stdin.write(json.dumps({"command": "quit"}) + "\n")
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except Exception:
+            self.process.kill()
+        for reader in self._readers:
+            reader.join(timeout=1)
+
 class BlenderRenderNode:
     @classmethod
     def INPUT_TYPES(cls):
@@ -59,6 +395,10 @@ class BlenderRenderNode:
                 "samples": ("INT", {"default": 128, "min": 1, "max": 4096, "step": 1}),
                 "use_denoising": ("BOOLEAN", {"default": True}),
                 "adaptive_sampling": ("BOOLEAN", {"default": True}),
+            },
+            "optional": {
+                # Ship roughness/specular as one packed texture (first channel of each)
+                "pack_rgba": ("BOOLEAN", {"default": False}),
             }
         }
 
@@ -66,133 +406,155 @@ class BlenderRenderNode:
     FUNCTION = "render"
     CATEGORY = "External/Blender"
     OUTPUT_NODE = False
+
+    # Shared Blender worker, started on the first render
+    _worker = None
+    _worker_lock = threading.Lock()
+
+    @classmethod
+    def running_worker(cls, blender_path, blend_file):
+        """Return the current worker if it is alive and serves this scene, else None."""
+        worker = cls._worker
+        if worker is None or not worker.is_alive() or worker.blender_path != blender_path or worker.blend_file != blend_file:
+            return None
+        return worker
+
+    @classmethod
+    def get_worker(cls, blender_path, blend_file):
+        """Return the running Blender worker, (re)starting it if needed."""
+        worker = cls.running_worker(blender_path, blend_file)
+        if worker is None:
+            if cls._worker is not None:
+                cls._worker.close()
+            worker = cls._worker = BlenderWorker(blender_path, blend_file)
+        return worker
+
+    @classmethod
+    def shutdown_worker(cls):
+        if cls._worker is not None:
+            cls._worker.close()
+            cls._worker = None
     
-    # Force ComfyUI to reload the node by using a unique hash
+    # Deterministic fingerprint of the inputs, so ComfyUI can reuse a cached render
     @classmethod  
-    def IS_CHANGED(cls, **kwargs):
-        import time
-        return str(time.time())  # Always return a unique value
-
-    def render(self, diffuse_texture, normal_texture, roughness_texture, specular_texture, use_gpu=True, samples=128, use_denoising=True, adaptive_sampling=True):
-        # Get paths relative to the node directory
-        node_dir = os.path.dirname(os.path.abspath(__file__))
-        script_path = os.path.join(node_dir, "blender_render_script.py")
-        
-        # Use the auto-detected Blender path
+    def IS_CHANGED(cls, diffuse_texture=None, normal_texture=None, roughness_texture=None, specular_texture=None,
+                   use_gpu=True, samples=128, use_denoising=True, adaptive_sampling=True, pack_rgba=False):
+        h = hashlib.blake2b(digest_size=16)
+        for value in (diffuse_texture, normal_texture, roughness_texture, specular_texture,
+                      use_gpu, samples, use_denoising, adaptive_sampling, pack_rgba):
+            update_input_hash(h, value)
+        return h.hexdigest()
+
+    def render(self, diffuse_texture, normal_texture, roughness_texture, specular_texture, use_gpu=True, samples=128, use_denoising=True, adaptive_sampling=True, pack_rgba=False):
+        # Use the auto-detected Blender path (cached after the first successful lookup)
         blender_path = get_default_blender_path()
-        if not blender_path or not os.path.exists(blender_path):
-            raise FileNotFoundError(f"Blender executable not found. Expected at: {blender_path}")
+        if not blender_path:
+            raise FileNotFoundError("Blender executable not found.")
         
         # Use the bundled blend file
-        blend_file = os.path.join(node_dir, "untitled.blend")
-        if not os.path.exists(blend_file):
-            raise FileNotFoundError(f"Blender scene file not found at: {blend_file}")
-        
-        # Generate unique output filename with timestamp
-        import time
-        timestamp = int(time.time())
-        output_path = os.path.join(node_dir, f"render_output_{timestamp}.png")
+        blend_file = get_blend_file()
         
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-        # Create temporary directory for textures
-        temp_dir = tempfile.mkdtemp(prefix="comfyui_blender_textures_")
+        shared_blocks = []
         
         try:
-            # Save texture inputs to temporary files
-            texture_paths = {}
             texture_inputs = {
                 "diffuse": diffuse_texture,
                 "normal": normal_texture,
                 "roughness": roughness_texture,
                 "specular": specular_texture
             }
+            if pack_rgba:
+                packed = pack_orm_texture(roughness_texture, specular_texture)
+                if packed is not None:
+                    del texture_inputs["roughness"], texture_inputs["specular"]
+                    texture_inputs["orm"] = packed
+                else:
+                    print("Warning: Roughness and specular textures differ in size, sending them separately")
             
-            for tex_name, tex_tensor in texture_inputs.items():
-                # Convert tensor to PIL Image
-                if tex_tensor.dim() == 4:  # Remove batch dimension if present
-                    tex_tensor = tex_tensor.squeeze(0)
+            debug(f"Running Blender render with GPU: {use_gpu}, Samples: {samples}")
+            
+            with self._worker_lock:
+                # Textures a running worker already holds are only sent as hashes
+                running = self.running_worker(blender_path, blend_file)
+                cached_hashes = running.texture_hashes if running is not None else {}
                 
-                # Convert from [0,1] float to [0,255] uint8
-                tex_array = (tex_tensor.cpu().numpy() * 255).astype(np.uint8)
-                tex_image = Image.fromarray(tex_array)
+                with ThreadPoolExecutor(max_workers=len(texture_inputs) + 1) as executor:
+                    # Start (or check) the Blender worker while the textures are prepared
+                    worker_future = executor.submit(self.get_worker, blender_path, blend_file)
+                    texture_futures = {
+                        tex_name: executor.submit(prepare_texture, tex_name, tex_tensor, cached_hashes.get(tex_name))
+                        for tex_name, tex_tensor in texture_inputs.items()
+                    }
+                    
+                    # Collect every result first so all shared blocks get released on failure
+                    texture_sources = {}
+                    errors = []
+                    for tex_name, future in texture_futures.items():
+                        try:
+                            texture_sources[tex_name], shm = future.result()
+                        except Exception as e:
+                            errors.append(e)
+                            continue
+                        if shm is not None:
+                            shared_blocks.append(shm)
+                    if errors:
+                        raise errors[0]
+                    worker = worker_future.result()
                 
-                # Save to temporary file with maximum quality
-                tex_path = os.path.join(temp_dir, f"input_{tex_name}.png")
-                tex_image.save(tex_path, optimize=False, compress_level=0)  # No compression for max quality
-                texture_paths[tex_name] = tex_path
-                print(f"Saved {tex_name} texture to: {tex_path}")
-
-            # Prepare command following Linux guide approach: 
-            # subprocess.run([blender_path, "-b", "-P", script_path])
-            cmd = [
-                blender_path,
-                "-b",  # Background mode (no GUI)
-                blend_file,  # .blend file to open
-                "-P", script_path,  # Python script to execute
-                "--",  # Separator for script arguments
-                texture_paths["diffuse"],
-                texture_paths["normal"], 
-                texture_paths["roughness"],
-                texture_paths["specular"],
-                output_path,
-                str(use_gpu).lower(),
-                str(samples),
-                str(use_denoising).lower(),
-                str(adaptive_sampling).lower()
-            ]
-            
-            print(f"Running Blender render with GPU: {use_gpu}, Samples: {samples}")
-            print("Command:", " ".join([f'"{arg}"' if ' ' in arg else arg for arg in cmd]))
-            
-            try:
-                # Use relative path approach as recommended in Linux guide
-                result = subprocess.run(cmd, check=True, capture_output=True, text=True, 
-                                      cwd=node_dir)  # Set working directory to node folder
-                print("Blender render completed successfully!")
-                if result.stdout:
-                    print("Blender output:", result.stdout[-500:])  # Show last 500 chars
-                if result.stderr:
-                    print("Blender warnings:", result.stderr[-500:])
-            except PermissionError as e:
-                if platform.system() == "Windows":
-                    error_msg = f"Permission denied when trying to execute Blender. Try running: Unblock-File '{blender_path}' in PowerShell as administrator."
-                else:  # Linux
-                    error_msg = f"Permission denied when trying to execute Blender. Try running: chmod +x '{blender_path}'"
-                print(error_msg)
-                raise PermissionError(error_msg) from e
-            except subprocess.CalledProcessError as e:
-                print(f"Blender render failed with code {e.returncode}")
-                print("Error output:", e.stderr)
-                raise
+                # A freshly started worker has none of the cached textures
+                if worker is not running:
+                    for tex_name, source in texture_sources.items():
+                        if "shm" not in source and "path" not in source:
+                            texture_sources[tex_name], shm = prepare_texture(tex_name, texture_inputs[tex_name])
+                            if shm is not None:
+                                shared_blocks.append(shm)
+                
+                # Chosen once the textures are in shared memory, so tmpfs is
+                # only used if the render still fits next to them. A unique
+                # name - a timestamp collides for renders within the same second
+                output_path = os.path.join(get_output_dir(worker.output_size), f"render_output_{uuid.uuid4().hex}.tif")
+                
+                job = {
+                    "textures": texture_sources,
+                    "output_path": output_path,
+                    "use_gpu": use_gpu,
+                    "samples": samples,
+                    "use_denoising": use_denoising,
+                    "adaptive_sampling": adaptive_sampling
+                }
+                worker.render(job)
+            debug("Blender render completed successfully!")
 
             # Load the rendered image
             if not os.path.exists(output_path):
                 raise FileNotFoundError(f"Render output not found: {output_path}")
             
-            img = Image.open(output_path).convert("RGB")
-            arr = np.array(img).astype(np.float32) / 255.0
-            tensor = torch.from_numpy(arr)[None,]  # add batch dimension
+            with Image.open(output_path) as img:
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
+                arr = np.asarray(img)
+            
+            # Cast and scale in one pass straight into the (batched) output tensor
+            tensor = torch.empty((1, *arr.shape), dtype=torch.float32)
+            np.multiply(arr, 1.0 / 255.0, out=tensor[0].numpy(), dtype=np.float32)
             
             # Clean up the output file after loading
             try:
                 os.remove(output_path)
-                print(f"Cleaned up render output: {output_path}")
+                debug(f"Cleaned up render output: {output_path}")
             except Exception as e:
                 print(f"Warning: Could not clean up output file: {e}")
             
             return (tensor,)
             
         finally:
-            # Clean up temporary files
-            import shutil
-            try:
-                shutil.rmtree(temp_dir)
-                print(f"Cleaned up temporary directory: {temp_dir}")
-            except Exception as e:
-                print(f"Warning: Could not clean up temp dir {temp_dir}: {e}")
+            # Blender has copied the pixels (or failed) - free the shared blocks
+            release_shared_textures(shared_blocks)
+
+# Stop the Blender worker together with ComfyUI
+atexit.register(BlenderRenderNode.shutdown_worker)
 
 NODE_CLASS_MAPPINGS = {
     "Blender Render Node": BlenderRenderNode
-}
\ No newline at end of file
+}
@@ -1,324 +1,432 @@
 import bpy
 import os
 import sys
+import json
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
 
-# Parse command line arguments
-argv = sys.argv
-argv = argv[argv.index("--") + 1:]
-
-if len(argv) < 9:
-    print("Error: Not enough arguments provided")
-    print("Expected: diffuse_path normal_path roughness_path specular_path output_path use_gpu samples use_denoising adaptive_sampling")
-    sys.exit(1)
-
-diffuse_path = argv[0]
-normal_path = argv[1]
-roughness_path = argv[2]
-specular_path = argv[3]
-output_path = argv[4]
-use_gpu = argv[5].lower() == 'true'
-samples = int(argv[6])
-use_denoising = argv[7].lower() == 'true'
-adaptive_sampling = argv[8].lower() == 'true'
-
-print(f"=== Blender Render Configuration ===")
-print(f"Diffuse texture: {diffuse_path}")
-print(f"Normal texture: {normal_path}")
-print(f"Roughness texture: {roughness_path}")
-print(f"Specular texture: {specular_path}")
-print(f"Output: {output_path}")
-print(f"GPU: {use_gpu}")
-print(f"Samples: {samples}")
-print(f"Denoising: {use_denoising}")
-print(f"Adaptive sampling: {adaptive_sampling}")
+# Protocol markers shared with BlenderWorker in blender_node.py
+READY_MARKER = "COMFY_BLENDER_READY"
+DONE_MARKER = "COMFY_BLENDER_DONE"
+ERROR_MARKER = "COMFY_BLENDER_ERROR"
+
+# Progress logging is off unless COMFY_BLENDER_DEBUG=1 (inherited from ComfyUI);
+# warnings and errors are always printed
+DEBUG = os.environ.get("COMFY_BLENDER_DEBUG", "").strip().lower() in ("1", "true", "yes", "on")
+
+def debug(*args):
+    if DEBUG:
+        print(*args)
 
 curtain_objects = ["cur_1", "cur_2"]
-texture_paths = {
-    "diffuse": diffuse_path,
-    "normal": normal_path,
-    "roughness": roughness_path,
-    "specular": specular_path
+
+# GPU backend that worked last time, so later sessions skip probing the others
+GPU_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".blender_gpu.cache")
+GPU_DEVICE_TYPES = ['OPTIX', 'CUDA', 'OPENCL', 'HIP']
+
+def parse_args(argv):
+    """Parse one-shot command line arguments into a render job."""
+    if len(argv) < 9:
+        print("Error: Not enough arguments provided")
+        print("Expected: diffuse_path normal_path roughness_path specular_path output_path use_gpu samples use_denoising adaptive_sampling")
+        sys.exit(1)
+
+    return {
+        "textures": {
+            "diffuse": argv[0],
+            "normal": argv[1],
+            "roughness": argv[2],
+            "specular": argv[3]
+        },
+        "output_path": argv[4],
+        "use_gpu": argv[5].lower() == 'true',
+        "samples": int(argv[6]),
+        "use_denoising": argv[7].lower() == 'true',
+        "adaptive_sampling": argv[8].lower() == 'true'
+    }
+
+def send(marker, message=""):
+    """Write a protocol line and flush it straight through the pipe."""
+    sys.stdout.write(f"{marker} {message}\n" if message else f"{marker}\n")
+    sys.stdout.flush()
+
+def texture_colorspace(tex_key):
+    """Data maps are read as raw values, only the diffuse map is color."""
+    return 'Non-Color' if tex_key in ["normal", "roughness", "specular", PACKED_KEY] else 'sRGB'
+
+def load_shared_texture(tex_key, source):
+    """Fill an image with the RGBA uint8 pixels the node put in shared memory."""
+    width, height = source["width"], source["height"]
+    shm = shared_memory.SharedMemory(name=source["shm"])
+    try:
+        # The node owns (and unlinks) the block - keep this process's
+        # resource tracker from unlinking it again on exit
+        if os.name == "posix":
+            resource_tracker.unregister(shm._name, "shared_memory")
+        pixels = np.ndarray((height, width, 4), dtype=np.uint8, buffer=shm.buf)
+        # Blender images start at the bottom row; scale in place on the float copy
+        flat_pixels = np.flipud(pixels).astype(np.float32)
+        flat_pixels *= 1.0 / 255.0
+        flat_pixels = flat_pixels.reshape(-1)
+        del pixels
+    finally:
+        shm.close()
+
+    # Refill the image from the previous job when the size still matches,
+    # instead of allocating a new data-block every render
+    name = f"input_{tex_key}"
+    img = bpy.data.images.get(name)
+    if img is None or tuple(img.size) != (width, height) or img.source != 'GENERATED':
+        img = bpy.data.images.new(name, width, height, alpha=True, float_buffer=False)
+        debug(f"Created image {name} ({width}x{height})")
+    else:
+        debug(f"Reusing image {name} ({width}x{height})")
+
+    # Set the colorspace before the pixels go in, so the buffer is not rebuilt after
+    img.colorspace_settings.name = texture_colorspace(tex_key)
+    img.pixels.foreach_set(flat_pixels)
+    img.update()
+    return img
+
+def load_texture_image(tex_key, source, images_by_path):
+    """Load a texture from a file path or a shared memory descriptor."""
+    if isinstance(source, dict):
+        if "shm" in source:
+            debug(f"Loading {tex_key} texture from shared memory {source['shm']}")
+            return load_shared_texture(tex_key, source)
+        source = source["path"]
+
+    if not os.path.exists(source):
+        print(f"Texture file not found: {source}")
+        return None
+
+    name = os.path.basename(source)
+    # Reuse any existing image with the same path instead of loading a copy
+    new_img = images_by_path.get(source)
+    if new_img:
+        # The worker stays alive between renders, so pick up new file contents
+        new_img.reload()
+        debug(f"Reusing existing image: {name}")
+    else:
+        new_img = bpy.data.images.load(source, check_existing=False)
+        debug(f"Loaded new image: {name}")
+    
+    # Set appropriate colorspace AFTER loading the image
+    new_img.colorspace_settings.name = texture_colorspace(tex_key)
+    debug(f"Set {tex_key} texture colorspace to {new_img.colorspace_settings.name}")
+    return new_img
+
+# Principled BSDF input each texture type connects to
+_INPUT_MAPPING = {
+    "diffuse": "Base Color",
+    "normal": "Normal", 
+    "roughness": "Roughness",
+    "specular": "Specular IOR Level"  # Changed back to proper specular input for Blender 4.x
 }
 
-def replace_texture_in_nodes(material, tex_key, texture_file_path):
+# Fallback inputs for different Blender versions
+_FALLBACK_MAPPING = {
+    "specular": ("Metallic", "Specular", "Specular IOR Level"),
+    "diffuse": ("Base Color", "Albedo"),
+    "roughness": ("Roughness",),
+    "normal": ("Normal",)
+}
+
+# Packed "ORM" texture: occlusion in R (unused here), roughness in G, specular in B
+PACKED_KEY = "orm"
+PACKED_CHANNELS = {"roughness": "Green", "specular": "Blue"}
+
+def resolve_target_inputs(input_names):
+    """Map each texture type to the first of its inputs this Principled BSDF has."""
+    return {
+        tex_key: next((name for name in (target, *_FALLBACK_MAPPING.get(tex_key, ())) if name in input_names), None)
+        for tex_key, target in _INPUT_MAPPING.items()
+    }
+
+def replace_texture_in_nodes(material, principled_node, tex_key, target_input, new_img):
     """Replace texture in material nodes more reliably."""
-    if not material.use_nodes:
-        return False
-    
     nodes = material.node_tree.nodes
     links = material.node_tree.links
     
-    # Find Principled BSDF node first
-    principled_node = None
-    for node in nodes:
-        if node.type == 'BSDF_PRINCIPLED':
-            principled_node = node
-            break
-    
-    if not principled_node:
-        print(f"No Principled BSDF found in {material.name}")
-        return False
-    
-    # Debug: Print available inputs for first material only
-    if tex_key == "diffuse":  # Only print once per material
-        print(f"Available inputs in {material.name} Principled BSDF:")
-        for inp in principled_node.inputs:
-            print(f"  - {inp.name}")
-    
-    # Create or find the appropriate texture node for this texture type
+    # Try to find existing connected image texture node
     texture_node = None
-    
-    # Look for existing texture nodes connected to the right input
-    input_mapping = {
-        "diffuse": "Base Color",
-        "normal": "Normal", 
-        "roughness": "Roughness",
-        "specular": "Specular IOR Level"  # Changed back to proper specular input for Blender 4.x
-    }
-    
-    target_input = input_mapping.get(tex_key)
-    if not target_input:
-        print(f"Unknown texture type: {tex_key}")
-        return
-    
-    # Check if the target input exists in this Principled BSDF version
-    if target_input not in principled_node.inputs:
-        print(f"Input '{target_input}' not found in Principled BSDF. Available inputs:")
-        for inp in principled_node.inputs:
-            print(f"  - {inp.name}")
-        
-        # Fallback mapping for different Blender versions
-        fallback_mapping = {
-            "specular": ["Metallic", "Specular", "Specular IOR Level"],
-            "diffuse": ["Base Color", "Albedo"],
-            "roughness": ["Roughness"],
-            "normal": ["Normal"]
-        }
-        
-        # Try fallback options
-        for fallback in fallback_mapping.get(tex_key, []):
-            if fallback in principled_node.inputs:
-                target_input = fallback
-                print(f"Using fallback input: {target_input}")
+    input_socket = principled_node.inputs[target_input]
+    if input_socket.is_linked:
+        for link in input_socket.links:
+            if link.from_node.type == 'TEX_IMAGE':
+                texture_node = link.from_node
                 break
-        else:
-            print(f"No suitable input found for {tex_key}")
-            return
-        
-    # Try to find existing connected image texture node
-    if target_input in principled_node.inputs:
-        input_socket = principled_node.inputs[target_input]
-        if input_socket.is_linked:
-            for link in input_socket.links:
-                if link.from_node.type == 'TEX_IMAGE':
-                    texture_node = link.from_node
-                    break
     
-    # If no existing texture node, create a new one
+    # Otherwise reuse the one created by an earlier job, or create a new one
+    if not texture_node:
+        texture_node = nodes.get(f"{tex_key}_texture")
     if not texture_node:
         texture_node = nodes.new(type='ShaderNodeTexImage')
         texture_node.location = (-400, 0 - len(nodes) * 50)  # Position it nicely
         texture_node.name = f"{tex_key}_texture"  # Give it a descriptive name
         
     # Always ensure proper connection (reconnect if needed)
-    if target_input in principled_node.inputs:
-        if tex_key == "normal":
-            # For normal maps, we need a Normal Map node
-            normal_map_node = None
-            # Check if Normal Map node already exists
-            for node in nodes:
-                if node.type == 'NORMAL_MAP' and node.name.startswith(f"{tex_key}_"):
-                    normal_map_node = node
-                    break
-            
-            if not normal_map_node:
-                normal_map_node = nodes.new(type='ShaderNodeNormalMap')
-                normal_map_node.location = (-200, texture_node.location.y)
-                normal_map_node.name = f"{tex_key}_normal_map"
-            
-            # Clear existing connections and reconnect
-            links.new(texture_node.outputs['Color'], normal_map_node.inputs['Color'])
-            links.new(normal_map_node.outputs['Normal'], principled_node.inputs['Normal'])
-            print(f"Connected {tex_key} texture through Normal Map node")
-        else:
-            # Direct connection for other texture types
-            links.new(texture_node.outputs['Color'], principled_node.inputs[target_input])
-            print(f"Connected {tex_key} texture to {target_input}")
+    if tex_key == "normal":
+        # For normal maps, we need a Normal Map node
+        normal_map_node = None
+        # Check if Normal Map node already exists
+        for node in nodes:
+            if node.type == 'NORMAL_MAP' and node.name.startswith(f"{tex_key}_"):
+                normal_map_node = node
+                break
+        
+        if not normal_map_node:
+            normal_map_node = nodes.new(type='ShaderNodeNormalMap')
+            normal_map_node.location = (-200, texture_node.location.y)
+            normal_map_node.name = f"{tex_key}_normal_map"
+        
+        # Clear existing connections and reconnect
+        links.new(texture_node.outputs['Color'], normal_map_node.inputs['Color'])
+        links.new(normal_map_node.outputs['Normal'], principled_node.inputs['Normal'])
+        debug(f"Connected {tex_key} texture through Normal Map node")
     else:
-        print(f"Warning: Target input '{target_input}' not found for {tex_key}")
-        return
+        # Direct connection for other texture types
+        links.new(texture_node.outputs['Color'], principled_node.inputs[target_input])
+        debug(f"Connected {tex_key} texture to {target_input}")
     
-    # Load and assign the new texture
-    if os.path.exists(texture_file_path):
+    # Assign the loaded texture
+    texture_node.image = new_img
+    debug(f"Successfully applied {tex_key} texture to {material.name}: {new_img.name}")
+
+def connect_packed_texture(material, principled_node, target_inputs, new_img):
+    """Wire a packed ORM texture through Separate Color into the roughness and specular inputs."""
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
+    
+    texture_node = nodes.get(f"{PACKED_KEY}_texture")
+    if not texture_node:
+        texture_node = nodes.new(type='ShaderNodeTexImage')
+        texture_node.location = (-600, 0 - len(nodes) * 50)  # Position it nicely
+        texture_node.name = f"{PACKED_KEY}_texture"
+    
+    separate_node = nodes.get(f"{PACKED_KEY}_separate")
+    if not separate_node:
+        separate_node = nodes.new(type='ShaderNodeSeparateColor')
+        separate_node.location = (-300, texture_node.location.y)
+        separate_node.name = f"{PACKED_KEY}_separate"
+    
+    links.new(texture_node.outputs['Color'], separate_node.inputs['Color'])
+    for tex_key, channel in PACKED_CHANNELS.items():
+        target_input = target_inputs.get(tex_key)
+        if not target_input:
+            print(f"  No suitable input found for {tex_key}")
+            continue
+        links.new(separate_node.outputs[channel], principled_node.inputs[target_input])
+        debug(f"Connected {PACKED_KEY} {channel} channel to {target_input}")
+    
+    texture_node.image = new_img
+    debug(f"Successfully applied {PACKED_KEY} texture to {material.name}: {new_img.name}")
+
+def apply_textures_to_material(material, images):
+    """Apply the loaded textures to one material; return how many were applied."""
+    if not material.use_nodes:
+        return 0
+    
+    # Find Principled BSDF node first
+    principled_node = None
+    for node in material.node_tree.nodes:
+        if node.type == 'BSDF_PRINCIPLED':
+            principled_node = node
+            break
+    
+    if not principled_node:
+        print(f"No Principled BSDF found in {material.name}")
+        return 0
+    
+    # Resolve every texture's target input against a single walk of the inputs
+    input_list = [inp.name for inp in principled_node.inputs]
+    debug(f"Available inputs in {material.name} Principled BSDF:")
+    for name in input_list:
+        debug(f"  - {name}")
+    target_inputs = resolve_target_inputs(frozenset(input_list))
+    
+    applied = 0
+    for tex_key, new_img in images.items():
+        target_input = None
+        if tex_key != PACKED_KEY:
+            target_input = target_inputs.get(tex_key)
+            if not target_input:
+                print(f"  No suitable input found for {tex_key}")
+                continue
+            if target_input != _INPUT_MAPPING[tex_key]:
+                debug(f"  Using fallback input: {target_input}")
+        if new_img is None:
+            print(f"  Failed to apply {tex_key} to {material.name}")
+            continue
         try:
-            # Remove any existing image with the same path to force reload
-            existing_img = None
-            for img in bpy.data.images:
-                if img.filepath == texture_file_path:
-                    existing_img = img
-                    break
-            
-            if existing_img:
-                new_img = existing_img
-                print(f"Reusing existing image: {os.path.basename(texture_file_path)}")
-            else:
-                new_img = bpy.data.images.load(texture_file_path, check_existing=False)
-                print(f"Loaded new image: {os.path.basename(texture_file_path)}")
-            
-            # Assign image to texture node
-            texture_node.image = new_img
-            
-            # Set appropriate colorspace AFTER loading the image
-            if tex_key in ["normal", "roughness", "specular"]:
-                new_img.colorspace_settings.name = 'Non-Color'
-                print(f"Set {tex_key} texture colorspace to Non-Color")
+            if tex_key == PACKED_KEY:
+                connect_packed_texture(material, principled_node, target_inputs, new_img)
             else:
-                new_img.colorspace_settings.name = 'sRGB'
-                print(f"Set {tex_key} texture colorspace to sRGB")
-                
-            print(f"Successfully applied {tex_key} texture to {material.name}: {os.path.basename(texture_file_path)}")
-            
+                replace_texture_in_nodes(material, principled_node, tex_key, target_input, new_img)
+            applied += 1
         except Exception as e:
-            print(f"Error loading texture {texture_file_path}: {e}")
-            return False
-    else:
-        print(f"Texture file not found: {texture_file_path}")
-        return False
-    
-    return True
+            print(f"  Error applying {tex_key} to {material.name}: {e}")
+    return applied
+
+# Textures applied in this Blender session: content hash and image name per
+# texture type, and the result of the last complete material update
+texture_state = {"hashes": {}, "images": {}, "applied": None}
 
-def apply_textures_to_all_materials():
+def apply_textures_to_all_materials(texture_sources):
     """Apply textures to all materials in all curtain objects."""
-    print("=== Applying Textures to All Curtain Materials ===")
+    debug("=== Applying Textures to All Curtain Materials ===")
     
     success_count = 0
     total_count = 0
+
+    # Textures with the same content hash as last time are already loaded and wired
+    unchanged = {}
+    for tex_key, source in texture_sources.items():
+        tex_hash = source.get("hash") if isinstance(source, dict) else None
+        if tex_hash is not None and texture_state["hashes"].get(tex_key) == tex_hash:
+            img = bpy.data.images.get(texture_state["images"].get(tex_key, ""))
+            if img is not None:
+                unchanged[tex_key] = img
+                continue
+        if isinstance(source, dict) and "shm" not in source and "path" not in source:
+            raise RuntimeError(f"{tex_key} texture was sent by hash only but is not loaded in this Blender session")
+
+    if len(unchanged) == len(texture_sources) and texture_state["applied"]:
+        debug("=== Textures unchanged, keeping material nodes ===")
+        return texture_state["applied"]
+
+    # Drop the images replaced by the previous job so bpy.data.images stays small
+    bpy.data.orphans_purge(do_recursive=True)
+    images_by_path = {img.filepath: img for img in bpy.data.images}
+
+    # Load every changed texture once, then share the images between materials
+    images = dict(unchanged)
+    for tex_key, source in texture_sources.items():
+        if tex_key in unchanged:
+            continue
+        try:
+            images[tex_key] = load_texture_image(tex_key, source, images_by_path)
+        except Exception as e:
+            print(f"Error loading {tex_key} texture: {e}")
+            images[tex_key] = None
+
+    texture_state["hashes"] = {
+        tex_key: source.get("hash") for tex_key, source in texture_sources.items()
+        if isinstance(source, dict) and images[tex_key] is not None
+    }
+    texture_state["images"] = {tex_key: img.name for tex_key, img in images.items() if img is not None}
     
     for obj_name in curtain_objects:
         obj = bpy.data.objects.get(obj_name)
         if obj and obj.type == 'MESH':
-            print(f"Processing object: {obj_name}")
+            debug(f"Processing object: {obj_name}")
             for i, slot in enumerate(obj.material_slots):
                 mat = slot.material
                 if mat:
-                    print(f"  Processing material: {mat.name}")
+                    debug(f"  Processing material: {mat.name}")
                     # Make sure the material uses nodes
                     if not mat.use_nodes:
                         mat.use_nodes = True
-                        print(f"  Enabled nodes for material: {mat.name}")
+                        debug(f"  Enabled nodes for material: {mat.name}")
                     
-                    for tex_key, tex_path in texture_paths.items():
-                        total_count += 1
-                        try:
-                            result = replace_texture_in_nodes(mat, tex_key, tex_path)
-                            if result:
-                                success_count += 1
-                            else:
-                                print(f"  Failed to apply {tex_key} to {mat.name}")
-                        except Exception as e:
-                            print(f"  Error applying {tex_key} to {mat.name}: {e}")
+                    total_count += len(images)
+                    success_count += apply_textures_to_material(mat, images)
                 else:
                     print(f"  Material slot {i} is empty")
         else:
             print(f"Object '{obj_name}' not found or not a mesh")
     
-    print(f"=== Texture Application Summary: {success_count}/{total_count} successful ===")
+    debug(f"=== Texture Application Summary: {success_count}/{total_count} successful ===")
+    # Only a complete update can be skipped next time
+    texture_state["applied"] = (success_count, total_count) if total_count and success_count == total_count else None
     return success_count, total_count
 
-# --- Apply textures to all curtain objects ---
-success_count, total_count = apply_textures_to_all_materials()
+def print_scene_info():
+    """Print scene information for debugging."""
+    debug("=== Scene Debug Information ===")
+    debug(f"Total objects in scene: {len(bpy.data.objects)}")
+    debug("Curtain objects status:")
+    for obj_name in curtain_objects:
+        obj = bpy.data.objects.get(obj_name)
+        if obj:
+            debug(f"  {obj_name}: Found, {len(obj.material_slots)} material slots")
+            for i, slot in enumerate(obj.material_slots):
+                mat_name = slot.material.name if slot.material else "None"
+                debug(f"    Slot {i}: {mat_name}")
+        else:
+            print(f"  {obj_name}: NOT FOUND")
 
-# --- Validate texture application ---
-if success_count == 0:
-    print("WARNING: No textures were successfully applied!")
-elif success_count < total_count:
-    print(f"WARNING: Only {success_count} out of {total_count} textures were applied successfully!")
-else:
-    print("SUCCESS: All textures applied successfully!")
-
-# --- Debug: Print scene information ---
-print("=== Scene Debug Information ===")
-print(f"Total objects in scene: {len(bpy.data.objects)}")
-print("Curtain objects status:")
-for obj_name in curtain_objects:
-    obj = bpy.data.objects.get(obj_name)
-    if obj:
-        print(f"  {obj_name}: Found, {len(obj.material_slots)} material slots")
-        for i, slot in enumerate(obj.material_slots):
-            mat_name = slot.material.name if slot.material else "None"
-            print(f"    Slot {i}: {mat_name}")
-    else:
-        print(f"  {obj_name}: NOT FOUND")
+def read_cached_gpu_type():
+    try:
+        with open(GPU_CACHE_FILE) as f:
+            device_type = f.read().strip()
+    except OSError:
+        return None
+    return device_type if device_type in GPU_DEVICE_TYPES else None
 
-# --- Set render camera ---
-camera_obj = bpy.data.objects.get("Camera.006")
-if camera_obj:
-    bpy.context.scene.camera = camera_obj
-    print("Render camera set to Camera.006")
-else:
-    raise Exception("Camera.006 not found in scene")
+def write_cached_gpu_type(device_type):
+    try:
+        with open(GPU_CACHE_FILE, "w") as f:
+            f.write(device_type)
+    except OSError as e:
+        print(f"Warning: Could not write GPU cache {GPU_CACHE_FILE}: {e}")
 
-# --- Configure rendering engine ---
-scene = bpy.context.scene
-scene.render.engine = "CYCLES"
+def enable_gpu_devices(cycles_prefs, scene, device_type, use_denoising):
+    """Render on all devices of one compute backend; return False if it has none."""
+    cycles_prefs.compute_device_type = device_type
+    cycles_prefs.get_devices()
+    
+    debug(f"--- Checking {device_type} devices ---")
+    type_devices = [device for device in cycles_prefs.devices if device.type == device_type]
+    if not type_devices:
+        return False
+    
+    debug(f"Found {len(type_devices)} {device_type} device(s)")
+    # Enable all GPU devices of this type
+    for device in cycles_prefs.devices:
+        if device.type == device_type:
+            device.use = True
+            debug(f"Enabled {device_type} device: {device.name}")
+        else:
+            device.use = False
+    
+    scene.cycles.device = "GPU"
+    debug(f"Successfully configured {device_type} GPU rendering")
+    
+    # Set denoiser to match GPU type
+    if device_type == 'OPTIX' and use_denoising:
+        scene.cycles.denoiser = 'OPTIX'
+        debug("Set denoiser to OptiX")
+    elif use_denoising:
+        scene.cycles.denoiser = 'OPENIMAGEDENOISE'
+        debug("Set denoiser to OpenImageDenoise")
+    return True
 
-# --- GPU Configuration ---
-if use_gpu:
+def configure_gpu(scene, use_denoising):
+    """Enable the first available GPU backend, falling back to CPU."""
     cycles_prefs = bpy.context.preferences.addons["cycles"].preferences
     
     # Debug: Print all available devices
-    print("=== Available Compute Devices ===")
+    debug("=== Available Compute Devices ===")
     for i, device in enumerate(cycles_prefs.devices):
-        print(f"Device {i}: {device.name} ({device.type}) - Use: {device.use}")
-
-    # Force refresh devices
-    try:
-        cycles_prefs.get_devices()
-        print("Refreshed device list")
-    except:
-        print("Could not refresh device list")
+        debug(f"Device {i}: {device.name} ({device.type}) - Use: {device.use}")
 
-    # Try different compute device types to find available GPUs
-    available_types = ['OPTIX', 'CUDA', 'OPENCL', 'HIP']
+    # Try the cached backend first, then the remaining ones
+    cached_type = read_cached_gpu_type()
+    device_types = [cached_type] if cached_type else []
+    device_types += [device_type for device_type in GPU_DEVICE_TYPES if device_type != cached_type]
     gpu_found = False
 
-    for device_type in available_types:
+    for device_type in device_types:
         try:
-            cycles_prefs.compute_device_type = device_type
-            cycles_prefs.get_devices()
-            
-            print(f"--- Checking {device_type} devices ---")
-            type_devices = []
-            for device in cycles_prefs.devices:
-                if device.type == device_type:
-                    type_devices.append(device)
-            
-            if type_devices:
-                print(f"Found {len(type_devices)} {device_type} device(s)")
-                # Enable all GPU devices of this type
-                for device in cycles_prefs.devices:
-                    if device.type == device_type:
-                        device.use = True
-                        print(f"Enabled {device_type} device: {device.name}")
-                    else:
-                        device.use = False
-                
-                scene.cycles.device = "GPU"
-                gpu_found = True
-                print(f"Successfully configured {device_type} GPU rendering")
-                
-                # Set denoiser to match GPU type
-                if device_type == 'OPTIX' and use_denoising:
-                    scene.cycles.denoiser = 'OPTIX'
-                    print("Set denoiser to OptiX")
-                elif use_denoising:
-                    scene.cycles.denoiser = 'OPENIMAGEDENOISE'
-                    print("Set denoiser to OpenImageDenoise")
-                
-                break
+            gpu_found = enable_gpu_devices(cycles_prefs, scene, device_type, use_denoising)
         except Exception as e:
             print(f"Error checking {device_type}: {e}")
             continue
+        if gpu_found:
+            if device_type != cached_type:
+                write_cached_gpu_type(device_type)
+            break
 
     if not gpu_found:
         print("=== GPU Setup Failed - Using CPU ===")
@@ -329,42 +437,153 @@ if use_gpu:
                 device.use = True
             else:
                 device.use = False
-        print("Configured CPU rendering")
-else:
-    print("=== Using CPU Rendering (GPU disabled by user) ===")
-    scene.cycles.device = "CPU"
-
-# --- Optimize Cycles settings ---
-scene.cycles.samples = samples
-scene.cycles.preview_samples = max(32, samples // 4)
-scene.cycles.use_adaptive_sampling = adaptive_sampling
-if adaptive_sampling:
-    scene.cycles.adaptive_threshold = 0.01
-
-# Advanced optimizations
-scene.cycles.feature_set = 'SUPPORTED'  # GPU-supported features only
-scene.cycles.use_denoising = use_denoising
-scene.cycles.use_preview_denoising = use_denoising
-
-# Memory optimizations
-scene.render.use_persistent_data = True
-scene.cycles.debug_use_spatial_splits = True
-# scene.cycles.debug_bvh_type = 'STATIC_BVH'
-
-print(f"Render settings: {samples} samples, GPU: {use_gpu}, Denoising: {use_denoising}")
-
-# --- Render settings ---
-scene.render.filepath = output_path
-scene.render.image_settings.file_format = "PNG"
-scene.render.image_settings.color_mode = 'RGB'
-
-# --- Render and save ---
-try:
-    print("Starting render...")
+        debug("Configured CPU rendering")
+
+# Settings already applied in this Blender session (the worker renders many jobs)
+render_state = {}
+
+def setup_scene():
+    """One-time scene setup: camera, engine, BVH and output options.
+
+    These are never touched again in the session, so Cycles' persistent data
+    (BVH, compiled shaders, device buffers) stays valid between renders.
+    """
+    # --- Set render camera ---
+    camera_obj = bpy.data.objects.get("Camera.006")
+    if camera_obj:
+        bpy.context.scene.camera = camera_obj
+        debug("Render camera set to Camera.006")
+    else:
+        raise Exception("Camera.006 not found in scene")
+
+    # --- Configure rendering engine ---
+    scene = bpy.context.scene
+    scene.render.engine = "CYCLES"
+
+    # Advanced optimizations
+    scene.cycles.feature_set = 'SUPPORTED'  # GPU-supported features only
+
+    # Memory optimizations
+    scene.render.use_persistent_data = True
+    scene.cycles.debug_use_spatial_splits = True
+    # scene.cycles.debug_bvh_type = 'STATIC_BVH'
+
+    # --- Render settings ---
+    # Uncompressed 8-bit TIFF: no deflate on save here, nor on load in the node
+    scene.render.image_settings.file_format = "TIFF"
+    scene.render.image_settings.color_mode = 'RGB'
+    scene.render.image_settings.color_depth = '8'
+    scene.render.image_settings.tiff_codec = 'NONE'
+
+def configure_render(job):
+    """Configure device and Cycles settings for a render job."""
+    use_gpu = job["use_gpu"]
+    samples = job["samples"]
+    use_denoising = job["use_denoising"]
+    adaptive_sampling = job["adaptive_sampling"]
+    scene = bpy.context.scene
+
+    if not render_state.get("scene_ready"):
+        setup_scene()
+        render_state["scene_ready"] = True
+
+    # --- GPU Configuration (only when the device choice changes) ---
+    devices = (use_gpu, use_denoising)
+    if render_state.get("devices") != devices:
+        if use_gpu:
+            configure_gpu(scene, use_denoising)
+        else:
+            debug("=== Using CPU Rendering (GPU disabled by user) ===")
+            scene.cycles.device = "CPU"
+        render_state["devices"] = devices
+
+    # --- Optimize Cycles settings (cheap, do not invalidate the BVH) ---
+    scene.cycles.samples = samples
+    scene.cycles.preview_samples = max(32, samples // 4)
+    scene.cycles.use_adaptive_sampling = adaptive_sampling
+    if adaptive_sampling:
+        scene.cycles.adaptive_threshold = 0.01
+    scene.cycles.use_denoising = use_denoising
+    scene.cycles.use_preview_denoising = use_denoising
+
+    debug(f"Render settings: {samples} samples, GPU: {use_gpu}, Denoising: {use_denoising}")
+    return scene
+
+def render(job):
+    """Apply the job's textures, render the scene and save it to the job's output path."""
+    output_path = job["output_path"]
+
+    debug(f"=== Blender Render Configuration ===")
+    for tex_key, source in job["textures"].items():
+        debug(f"{tex_key.capitalize()} texture: {source}")
+    debug(f"Output: {output_path}")
+    debug(f"GPU: {job['use_gpu']}")
+    debug(f"Samples: {job['samples']}")
+    debug(f"Denoising: {job['use_denoising']}")
+    debug(f"Adaptive sampling: {job['adaptive_sampling']}")
+
+    # --- Apply textures to all curtain objects ---
+    success_count, total_count = apply_textures_to_all_materials(job["textures"])
+
+    # --- Validate texture application ---
+    if success_count == 0:
+        print("WARNING: No textures were successfully applied!")
+    elif success_count < total_count:
+        print(f"WARNING: Only {success_count} out of {total_count} textures were applied successfully!")
+    else:
+        debug("SUCCESS: All textures applied successfully!")
+
+    print_scene_info()
+
+    scene = configure_render(job)
+    scene.render.filepath = output_path
+
+    # --- Render and save ---
+    debug("Starting render...")
     bpy.ops.render.render(write_still=True)
-    print(f"Render completed and saved to: {output_path}")
-except Exception as e:
-    print(f"Render failed: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
\ No newline at end of file
+    debug(f"Render completed and saved to: {output_path}")
+
+def run_daemon():
+    """Serve render jobs read as JSON lines from stdin until it is closed.
+
+    Blender, the .blend file and the Cycles devices are initialized once;
+    every job is answered with a DONE (carrying the held texture hashes)
+    or ERROR marker line on stdout.
+    """
+    # Report the output resolution so the node can pick where the render fits
+    render_settings = bpy.context.scene.render
+    scale = render_settings.resolution_percentage / 100
+    send(READY_MARKER, json.dumps({
+        "width": int(render_settings.resolution_x * scale),
+        "height": int(render_settings.resolution_y * scale)
+    }))
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+            if job.get("command") == "quit":
+                break
+            render(job)
+            # Report the textures actually held, so the node only skips those next time
+            send(DONE_MARKER, json.dumps(texture_state["hashes"]))
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            send(ERROR_MARKER, str(e).replace("\n", " "))
+
+# Parse command line arguments
+argv = sys.argv
+argv = argv[argv.index("--") + 1:] if "--" in sys.argv else []
+
+if argv and argv[0] == "--daemon":
+    run_daemon()
+else:
+    try:
+        render(parse_args(argv))
+    except Exception as e:
+        print(f"Render failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)